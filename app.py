@@ -6,394 +6,723 @@ A Flask-based web interface for creating multiple Zabbix hosts from IP lists
 
 import os
 import sys
+import fcntl
+import tempfile
 import configparser
-import json
+import copy
+import functools
+import itertools
+from dataclasses import dataclass
+import re
+import gzip
+import hashlib
+import ipaddress
+import atexit
+import queue
+import time
+import threading
+import orjson
 import requests
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, render_template, request, jsonify
+from flask.json.provider import JSONProvider
 from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 
 # Disable SSL warnings for self-signed certificates
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('zabbix_host_creator.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging: records are queued and written by a background thread
+# so file and console writes don't hold up request threads. The message is
+# still formatted in the calling thread (QueueHandler.prepare), only the I/O
+# moves to the listener. Queued records are flushed at exit; exec skips
+# atexit, so the listener must be stopped before exec'ing gunicorn.
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler('zabbix_host_creator.log')
+file_handler.setFormatter(log_formatter)
+console_handler = logging.StreamHandler(sys.stdout)
+console_handler.setFormatter(log_formatter)
+
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(QueueHandler(log_queue))
 logger = logging.getLogger(__name__)
 
+# IP lists may be separated by commas, semicolons, spaces or newlines
+IP_TOKEN = re.compile(r'[^\s,;]+')
+
+# Zabbix object IDs such as group IDs are unsigned integers
+ZABBIX_ID = re.compile(r'[0-9]{1,20}')
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider using orjson for faster encoding and decoding"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Build the body as bytes directly instead of going through a str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = 'your-secret-key-change-this'
 
+@dataclass(frozen=True)
+class ZabbixConfig:
+    """Settings read from config.ini"""
+    url: str
+    username: str
+    password: str
+    token_file: str
+    web_host: str
+    web_port: int
+    web_debug: bool
+    
+    @property
+    def api_url(self):
+        return f"{self.url}/api_jsonrpc.php"
+
+@functools.lru_cache(maxsize=1)
+def load_config(config_file='config.ini'):
+    """Read the configuration file once and reuse the parsed result"""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    
+    return ZabbixConfig(
+        # Zabbix configuration
+        url=config.get('zabbix', 'url'),
+        username=config.get('zabbix', 'username'),
+        password=config.get('zabbix', 'password'),
+        token_file=config.get(
+            'zabbix', 'token_file',
+            fallback=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zabbix_host_creator.token')
+        ),
+        # Web server configuration
+        web_host=config.get('webserver', 'host', fallback='0.0.0.0'),
+        web_port=config.getint('webserver', 'port', fallback=5000),
+        web_debug=config.getboolean('webserver', 'debug', fallback=False)
+    )
+
+def requires_auth(failure_result):
+    """Make sure the API is authenticated before running a ZabbixAPI method
+    
+    failure_result is returned when authentication fails.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.ensure_authenticated():
+                return copy.copy(failure_result)
+            return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 class ZabbixAPI:
-    def __init__(self, config_file='config.ini'):
-        self.config = configparser.ConfigParser()
-        self.config.read(config_file)
+    # Default ports for each interface type
+    DEFAULT_PORTS = {
+        1: "10050",  # Agent
+        2: "161",    # SNMP
+        3: "623",    # IPMI
+        4: "12345"   # JMX
+    }
+    
+    INTERFACE_NAMES = {1: "Agent", 2: "SNMP", 3: "IPMI", 4: "JMX"}
+    
+    # Interface-specific details for Zabbix 7.0
+    INTERFACE_DETAILS = {
+        2: {  # SNMP interface
+            "version": "2",  # SNMP version as string
+            "bulk": "1",     # Enable bulk requests
+            "community": "public"  # Default community string
+        },
+        3: {  # IPMI interface
+            "username": "",
+            "password": ""
+        },
+        4: {  # JMX interface
+            "username": "",
+            "password": ""
+        }
+    }
+    
+    def __init__(self, config=None):
+        if config is None:
+            config = load_config()
         
         # Zabbix configuration
-        self.zabbix_url = self.config.get('zabbix', 'url')
-        self.zabbix_user = self.config.get('zabbix', 'username')
-        self.zabbix_password = self.config.get('zabbix', 'password')
-        self.zabbix_api_url = f"{self.zabbix_url}/api_jsonrpc.php"
+        self.zabbix_url = config.url
+        self.zabbix_user = config.username
+        self.zabbix_password = config.password
+        self.zabbix_api_url = config.api_url
         
         # Web server configuration
-        self.web_host = self.config.get('webserver', 'host', fallback='0.0.0.0')
-        self.web_port = self.config.getint('webserver', 'port', fallback=5000)
-        self.web_debug = self.config.getboolean('webserver', 'debug', fallback=False)
+        self.web_host = config.web_host
+        self.web_port = config.web_port
+        self.web_debug = config.web_debug
         
         self.auth_token = None
+        self.auth_lock = threading.Lock()
+        self.request_ids = itertools.count(1)
+        
+        # Auth token shared between worker processes so they don't all log in
+        self.token_file = config.token_file
+        self.token_max_age = 3600
+        
+        # Host groups kept in memory as (time stored, JSON body, ETag). The
+        # encoded body is much smaller than the decoded list and is sent as is.
+        # Only groups are cached: they rarely change and this app never changes
+        # them. Host lists are always read from Zabbix, since each worker
+        # process would keep showing interfaces another worker has just changed.
+        self.groups_cache = None
+        self.groups_cache_ttl = 300
+        self.cache_lock = threading.Lock()
+        
         self.headers = {
             'Content-Type': 'application/json',
-            'User-Agent': 'Zabbix Host Creator'
+            'User-Agent': 'Zabbix Host Creator',
+            'Connection': 'keep-alive'
         }
         
+        # Number of concurrent API calls used for bulk operations
+        self.max_workers = 16
+        
+        # Seconds to wait for a Zabbix response; batch calls get extra time per item
+        self.request_timeout = 30
+        self.batch_item_timeout = 0.5
+        
+        # Static parts of host.create parameters, built once and reused for every host.
+        # The memos are keyed on request values, so at most memo_size entries are kept.
+        self.interface_defaults = {"main": 1, "useip": 1, "dns": ""}
+        self.group_params = {}
+        self.interface_templates = {}
+        self.memo_size = 256
+        
+        # Shared HTTP session so the TCP/TLS connection to Zabbix is reused
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = False
+        # Pool is larger than max_workers so concurrent web requests also get a connection.
+        # Mounted for both schemes so redirects (e.g. http -> https) use the same settings.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self.max_workers * 2,
+            pool_block=False,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        atexit.register(self.close)
+        
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self.session.close()
+    
+    def ensure_authenticated(self):
+        """Log in unless already authenticated
+        
+        Concurrent callers wait on a lock so only one of them logs in.
+        """
+        if not self.auth_token:
+            with self.auth_lock:
+                if not self.auth_token and not self.authenticate():
+                    return False
+        return True
+    
     def authenticate(self):
-        """Authenticate with Zabbix API"""
+        """Authenticate with Zabbix API, reusing a session shared by other workers"""
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "user.login",
-                "params": {
-                    "username": self.zabbix_user,
-                    "password": self.zabbix_password
-                },
-                "id": 1
-            }
-            
-            response = requests.post(
-                self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    self.auth_token = result['result']
-                    logger.info("Successfully authenticated with Zabbix")
+            lock_fd = os.open(f"{self.token_file}.lock", os.O_WRONLY | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+            with os.fdopen(lock_fd, 'w') as lock_file:
+                # Only one worker logs in at a time, the others pick up its token
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                
+                token = self.load_shared_token()
+                if token and token != self.auth_token and self.check_token(token):
+                    self.auth_token = token
+                    logger.info("Reusing Zabbix session from another worker")
                     return True
-                else:
-                    logger.error(f"Authentication failed: {result.get('error', 'Unknown error')}")
+                
+                if not self.login():
                     return False
-            else:
-                logger.error(f"HTTP error during authentication: {response.status_code}")
-                return False
                 
+                self.save_shared_token(self.auth_token)
+                return True
+                
+        except OSError as e:
+            logger.warning("Could not lock shared token file %s: %s", self.token_file, e)
+            return self.login()
+    
+    def load_shared_token(self):
+        """Read the auth token saved by another worker if it is recent enough
+        
+        The file is only trusted if it belongs to this user and nobody else
+        can read or write it, so another local user can't plant a session.
+        """
+        try:
+            fd = os.open(self.token_file, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+        
+        with os.fdopen(fd) as f:
+            stat = os.fstat(fd)
+            if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                logger.warning("Ignoring shared token file %s, it is not private to this user", self.token_file)
+                return None
+            if time.time() - stat.st_mtime > self.token_max_age:
+                return None
+            return f.read().strip() or None
+    
+    def save_shared_token(self, token):
+        """Atomically write the auth token for other workers (owner-only file)"""
+        tmp_file = None
+        try:
+            # mkstemp creates a new 0600 file under an unpredictable name
+            fd, tmp_file = tempfile.mkstemp(
+                dir=os.path.dirname(self.token_file) or '.',
+                prefix='.zabbix_host_creator.'
+            )
+            try:
+                os.write(fd, token.encode())
+            finally:
+                os.close(fd)
+            os.replace(tmp_file, self.token_file)
+        except OSError as e:
+            logger.warning("Could not save shared token file %s: %s", self.token_file, e)
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+    
+    def check_token(self, token):
+        """Check with Zabbix that an auth token is still valid"""
+        try:
+            success, _ = self.api_request("user.checkAuthentication", {"sessionid": token}, auth=False)
+            return success
+            
         except Exception as e:
-            logger.error(f"Exception during authentication: {str(e)}")
+            logger.error("Exception checking shared token: %s", e)
             return False
     
-    def get_host_groups(self):
-        """Get all host groups from Zabbix"""
-        if not self.auth_token:
-            if not self.authenticate():
-                return []
-        
+    def login(self):
+        """Log in to Zabbix API with the configured credentials"""
         try:
+            success, data = self.api_request("user.login", {
+                "username": self.zabbix_user,
+                "password": self.zabbix_password
+            }, auth=False)
+            
+            if success:
+                self.auth_token = data
+                logger.info("Successfully authenticated with Zabbix")
+                return True
+            
+            logger.error("Authentication failed: %s", data)
+            return False
+                
+        except Exception as e:
+            logger.error("Exception during authentication: %s", e)
+            return False
+    
+    def is_session_error(self, error):
+        """Check if a Zabbix API error means the auth token is no longer valid"""
+        error_text = f"{error.get('message', '')} {error.get('data', '')}".lower()
+        return (
+            're-login' in error_text
+            or 'not authorised' in error_text
+            or 'not authorized' in error_text
+        )
+    
+    def api_request(self, method, params, auth=True, timeout=None):
+        """Call a Zabbix API method
+        
+        Returns (True, result) or (False, Zabbix error message). Connection,
+        timeout and HTTP errors are raised instead, since Zabbix may still
+        have applied the call. For authenticated calls, if Zabbix reports the
+        session as expired, authenticates again and retries the call once.
+        """
+        for attempt in range(2):
+            auth_token = self.auth_token
             payload = {
                 "jsonrpc": "2.0",
-                "method": "hostgroup.get",
-                "params": {
-                    "output": ["groupid", "name"],
-                    "sortfield": "name"
-                },
-                "auth": self.auth_token,
-                "id": 2
+                "method": method,
+                "params": params,
+                "id": next(self.request_ids)
             }
+            if auth:
+                payload["auth"] = auth_token
             
-            response = requests.post(
+            response = self.session.post(
                 self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
+                data=orjson.dumps(payload),
+                timeout=timeout or self.request_timeout
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    return result['result']
-                else:
-                    logger.error(f"Error getting host groups: {result.get('error', 'Unknown error')}")
-                    return []
-            else:
-                logger.error(f"HTTP error getting host groups: {response.status_code}")
-                return []
+            if response.status_code != 200:
+                raise requests.HTTPError(f"HTTP error {response.status_code}", response=response)
+            
+            result = orjson.loads(response.content)
+            if 'result' in result:
+                return True, result['result']
+            
+            error = result.get('error', {})
+            error_msg = error.get('data') or error.get('message') or 'Unknown error'
+            if not auth or attempt or not self.is_session_error(error):
+                return False, error_msg
+            
+            logger.info("Zabbix session expired during %s, authenticating again", method)
+            with self.auth_lock:
+                # Another thread may already have renewed the token
+                if self.auth_token == auth_token and not self.authenticate():
+                    return False, error_msg
+        
+        return False, error_msg
+    
+    @requires_auth([])
+    def get_host_groups(self):
+        """Get all host groups from Zabbix"""
+        try:
+            success, groups = self.api_request("hostgroup.get", {
+                "output": ["groupid", "name"],
+                "sortfield": "name"
+            })
+            
+            if success:
+                return groups
+            
+            logger.error("Error getting host groups: %s", groups)
+            return []
                 
         except Exception as e:
-            logger.error(f"Exception getting host groups: {str(e)}")
+            logger.error("Exception getting host groups: %s", e)
             return []
     
+    @requires_auth([])
     def get_hosts_by_group(self, group_id):
         """Get hosts by group ID with their interfaces"""
-        if not self.auth_token:
-            if not self.authenticate():
-                return []
-        
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "host.get",
-                "params": {
-                    "output": ["hostid", "host", "name", "status"],
-                    "groupids": [group_id],
-                    "selectInterfaces": ["interfaceid", "ip", "dns", "port", "type", "main"],
-                    "sortfield": "name"
-                },
-                "auth": self.auth_token,
-                "id": 4
-            }
-            
-            response = requests.post(
-                self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
-            )
+            success, hosts = self.api_request("host.get", {
+                "output": ["hostid", "host", "name", "status"],
+                "groupids": [group_id],
+                "selectInterfaces": ["interfaceid", "ip", "dns", "port", "type", "main"],
+                "sortfield": "name"
+            })
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    return result['result']
-                else:
-                    logger.error(f"Error getting hosts: {result.get('error', 'Unknown error')}")
-                    return []
-            else:
-                logger.error(f"HTTP error getting hosts: {response.status_code}")
+            if not success:
+                logger.error("Error getting hosts: %s", hosts)
                 return []
+            
+            # Convert interface type and main flag once so callers can compare directly
+            for host in hosts:
+                for interface in host.get('interfaces', ()):
+                    interface['type'] = int(interface['type'])
+                    interface['main'] = interface['main'] == '1'
+            
+            return hosts
                 
         except Exception as e:
-            logger.error(f"Exception getting hosts: {str(e)}")
+            logger.error("Exception getting hosts: %s", e)
             return []
     
-    def create_host(self, hostname, ip_address, group_id, interface_type=1, interface_port=None):
-        """Create a single host in Zabbix with specified interface type"""
-        if not self.auth_token:
-            if not self.authenticate():
-                return False, "Authentication failed"
-        
-        # Default ports for each interface type
-        default_ports = {
-            1: "10050",  # Agent
-            2: "161",    # SNMP
-            3: "623",    # IPMI
-            4: "12345"   # JMX
-        }
+    def get_host_groups_json(self):
+        """Get all host groups as a JSON body and its ETag, cached together
+        
+        An empty list may be a failed request, so it isn't cached and its
+        ETag is None.
+        """
+        with self.cache_lock:
+            entry = self.groups_cache
+        if entry and time.monotonic() - entry[0] < self.groups_cache_ttl:
+            return entry[1], entry[2]
+        
+        groups = self.get_host_groups()
+        if not groups:
+            return b'[]', None
+        
+        body = orjson.dumps(groups)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        with self.cache_lock:
+            self.groups_cache = (time.monotonic(), body, etag)
+        return body, etag
+    
+    def build_interface_template(self, interface_type=1, interface_port=None):
+        """Build the host interface fields that don't depend on the host's IP
         
+        Templates are kept per (type, port) and shared, so callers must copy
+        them before adding host-specific fields.
+        """
         # Use provided port or default for interface type
-        port = interface_port if interface_port else default_ports.get(interface_type, "10050")
+        port = str(interface_port if interface_port else self.DEFAULT_PORTS.get(interface_type, "10050"))
         
+        interface = self.interface_templates.get((interface_type, port))
+        if interface is not None:
+            return interface
+        
+        if len(self.interface_templates) >= self.memo_size:
+            self.interface_templates.clear()
+        
+        interface = {
+            **self.interface_defaults,
+            "type": interface_type,
+            "port": port
+        }
+        
+        # Add interface-specific details for Zabbix 7.0
+        details = self.INTERFACE_DETAILS.get(interface_type)
+        if details:
+            interface["details"] = details
+        
+        self.interface_templates[(interface_type, port)] = interface
+        return interface
+    
+    def build_host_params(self, hostname, ip_address, group_id, interface_type=1, interface_port=None):
+        """Build host.create parameters for a single host with specified interface type"""
+        # Build interface configuration from the shared template for this type and port
+        interface = self.build_interface_template(interface_type, interface_port).copy()
+        interface["ip"] = ip_address
+        
+        # Reuse the same groups list for every host of a group
+        groups = self.group_params.get(group_id)
+        if groups is None:
+            if len(self.group_params) >= self.memo_size:
+                self.group_params.clear()
+            groups = self.group_params[group_id] = [{"groupid": group_id}]
+        
+        return {
+            "host": hostname,
+            "name": hostname,
+            "groups": groups,
+            "interfaces": [interface]
+        }
+    
+    @requires_auth((False, "Authentication failed"))
+    def create_host(self, hostname, ip_address, group_id, interface_type=1, interface_port=None, params=None):
+        """Create a single host in Zabbix with specified interface type
+        
+        params can carry host.create parameters already built with
+        build_host_params for the same host, so they aren't built twice.
+        """
         try:
-            # Build interface configuration
-            interface = {
-                "type": interface_type,
-                "main": 1,
-                "useip": 1,
-                "ip": ip_address,
-                "dns": "",
-                "port": str(port)
-            }
+            if params is None:
+                params = self.build_host_params(hostname, ip_address, group_id, interface_type, interface_port)
+            port = params["interfaces"][0]["port"]
             
-            # Add interface-specific details for Zabbix 7.0
-            if interface_type == 2:  # SNMP interface
-                interface["details"] = {
-                    "version": "2",  # SNMP version
-                    "bulk": "1",     # Enable bulk requests
-                    "community": "public"  # Default community string
-                }
-            elif interface_type == 3:  # IPMI interface
-                interface["details"] = {
-                    "username": "",
-                    "password": ""
-                }
-            elif interface_type == 4:  # JMX interface
-                interface["details"] = {
-                    "username": "",
-                    "password": ""
-                }
+            success, data = self.api_request("host.create", params)
             
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "host.create",
-                "params": {
-                    "host": hostname,
-                    "name": hostname,
-                    "groups": [{"groupid": group_id}],
-                    "interfaces": [interface]
-                },
-                "auth": self.auth_token,
-                "id": 3
-            }
-            
-            response = requests.post(
-                self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
-            )
+            if success:
+                host_id = data['hostids'][0]
+                interface_name = self.INTERFACE_NAMES.get(interface_type, "Unknown")
+                logger.debug("Successfully created host %s with ID %s and %s interface on port %s", hostname, host_id, interface_name, port)
+                return True, f"Host {hostname} created successfully with {interface_name} interface"
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    host_id = result['result']['hostids'][0]
-                    interface_type_names = {1: "Agent", 2: "SNMP", 3: "IPMI", 4: "JMX"}
-                    interface_name = interface_type_names.get(interface_type, "Unknown")
-                    logger.info(f"Successfully created host {hostname} with ID {host_id} and {interface_name} interface on port {port}")
-                    return True, f"Host {hostname} created successfully with {interface_name} interface"
-                else:
-                    error_msg = result.get('error', {}).get('data', 'Unknown error')
-                    logger.error(f"Error creating host {hostname}: {error_msg}")
-                    return False, f"Error creating host {hostname}: {error_msg}"
-            else:
-                logger.error(f"HTTP error creating host {hostname}: {response.status_code}")
-                return False, f"HTTP error creating host {hostname}"
+            logger.error("Error creating host %s: %s", hostname, data)
+            return False, f"Error creating host {hostname}: {data}"
                 
         except Exception as e:
-            logger.error(f"Exception creating host {hostname}: {str(e)}")
+            logger.error("Exception creating host %s: %s", hostname, e)
             return False, f"Exception creating host {hostname}: {str(e)}"
     
+    @requires_auth((False, "Authentication failed"))
+    def create_hosts_batch(self, hosts):
+        """Create several hosts with a single host.create call
+        
+        Returns (True, hostids) with the IDs in the same order as hosts,
+        or (False, error message). Zabbix creates either all hosts or none.
+        Exceptions are passed on: without a response the hosts may or may
+        not have been created.
+        """
+        success, data = self.api_request(
+            "host.create", hosts,
+            timeout=self.request_timeout + len(hosts) * self.batch_item_timeout
+        )
+        
+        if success:
+            logger.info("Successfully created %s hosts in one batch", len(data['hostids']))
+            return True, data['hostids']
+        
+        logger.error("Error creating host batch: %s", data)
+        return False, f"Error creating host batch: {data}"
+    
+    def build_interface_params(self, host_id, interface_type, ip_address, port, is_main=False):
+        """Build hostinterface.create parameters - Zabbix 7.0 compatible"""
+        # Base interface parameters according to Zabbix 7.0 documentation
+        interface_params = {
+            "hostid": str(host_id),
+            "main": "1" if is_main else "0",  # Make it main if needed
+            "type": str(interface_type),  # String value for interface type
+            "useip": "1",  # String value
+            "ip": str(ip_address),
+            "dns": "",
+            "port": str(port)
+        }
+        
+        # Add interface-specific details for Zabbix 7.0
+        details = self.INTERFACE_DETAILS.get(int(interface_type))
+        if details:
+            interface_params["details"] = details
+        
+        return interface_params
+    
+    @requires_auth((False, "Authentication failed"))
     def add_interface_to_host(self, host_id, interface_type, ip_address, port, is_main=False):
         """Add interface to a specific host - Zabbix 7.0 compatible"""
-        if not self.auth_token:
-            if not self.authenticate():
-                return False, "Authentication failed"
-        
         try:
-            # Base interface parameters according to Zabbix 7.0 documentation
-            interface_params = {
-                "hostid": str(host_id),
-                "main": "1" if is_main else "0",  # Make it main if needed
-                "type": str(interface_type),  # String value for interface type
-                "useip": "1",  # String value
-                "ip": str(ip_address),
-                "dns": "",
-                "port": str(port)
-            }
+            interface_params = self.build_interface_params(host_id, interface_type, ip_address, port, is_main)
             
-            # Add interface-specific details for Zabbix 7.0
-            if str(interface_type) == "2":  # SNMP interface
-                interface_params["details"] = {
-                    "version": "2",  # SNMP version as string
-                    "bulk": "1",     # Enable bulk requests
-                    "community": "public"  # Default community string
-                }
-            elif str(interface_type) == "3":  # IPMI interface
-                interface_params["details"] = {
-                    "username": "",
-                    "password": ""
-                }
-            elif str(interface_type) == "4":  # JMX interface
-                interface_params["details"] = {
-                    "username": "",
-                    "password": ""
-                }
+            success, data = self.api_request("hostinterface.create", interface_params)
             
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "hostinterface.create",
-                "params": interface_params,
-                "auth": self.auth_token,
-                "id": 5
-            }
-            
-            response = requests.post(
-                self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
-            )
+            if success:
+                logger.debug("Successfully added interface %s to host %s", data['interfaceids'][0], host_id)
+                return True, f"Interface added successfully"
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    interface_id = result['result']['interfaceids'][0]
-                    logger.info(f"Successfully added interface {interface_id} to host {host_id}")
-                    return True, f"Interface added successfully"
-                else:
-                    error_msg = result.get('error', {})
-                    error_data = error_msg.get('data', error_msg.get('message', 'Unknown error'))
-                    logger.error(f"Error adding interface to host {host_id}: {error_data}")
-                    return False, f"Error: {error_data}"
-            else:
-                logger.error(f"HTTP error adding interface to host {host_id}: {response.status_code}")
-                return False, f"HTTP error occurred"
+            logger.error("Error adding interface to host %s: %s", host_id, data)
+            return False, f"Error: {data}"
                 
         except Exception as e:
-            logger.error(f"Exception adding interface to host {host_id}: {str(e)}")
+            logger.error("Exception adding interface to host %s: %s", host_id, e)
             return False, f"Exception: {str(e)}"
     
+    @requires_auth((False, "Authentication failed"))
     def remove_interface_from_host(self, interface_id):
         """Remove interface from host"""
-        if not self.auth_token:
-            if not self.authenticate():
-                return False, "Authentication failed"
-        
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "method": "hostinterface.delete",
-                "params": [interface_id],
-                "auth": self.auth_token,
-                "id": 6
-            }
+            success, data = self.api_request("hostinterface.delete", [interface_id])
             
-            response = requests.post(
-                self.zabbix_api_url,
-                json=payload,
-                headers=self.headers,
-                verify=False,
-                timeout=30
-            )
+            if success:
+                logger.debug("Successfully removed interface %s", interface_id)
+                return True, f"Interface removed successfully"
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'result' in result:
-                    logger.info(f"Successfully removed interface {interface_id}")
-                    return True, f"Interface removed successfully"
-                else:
-                    error_msg = result.get('error', {}).get('data', 'Unknown error')
-                    logger.error(f"Error removing interface {interface_id}: {error_msg}")
-                    return False, f"Error: {error_msg}"
-            else:
-                logger.error(f"HTTP error removing interface {interface_id}: {response.status_code}")
-                return False, f"HTTP error occurred"
+            logger.error("Error removing interface %s: %s", interface_id, data)
+            return False, f"Error: {data}"
                 
         except Exception as e:
-            logger.error(f"Exception removing interface {interface_id}: {str(e)}")
+            logger.error("Exception removing interface %s: %s", interface_id, e)
             return False, f"Exception: {str(e)}"
     
+    @requires_auth((False, "Authentication failed"))
+    def interfaces_batch(self, method, params):
+        """Run hostinterface.create or hostinterface.delete for several interfaces in one call
+        
+        Zabbix applies either all changes or none. Exceptions are passed on:
+        without a response the changes may or may not have been applied.
+        """
+        success, data = self.api_request(
+            method, params,
+            timeout=self.request_timeout + len(params) * self.batch_item_timeout
+        )
+        
+        if success:
+            logger.info("Successfully ran %s for %s interfaces in one batch", method, len(params))
+            return True, data['interfaceids']
+        
+        logger.error("Error running %s batch: %s", method, data)
+        return False, f"Error: {data}"
+    
     def create_multiple_hosts(self, base_hostname, ip_list, group_id, use_ip_as_hostname=False, interface_type=1, interface_port=None):
-        """Create multiple hosts from IP list with specified interface type"""
+        """Create multiple hosts from IP list with specified interface type
+        
+        Results are in the order of ip_list. Invalid IP addresses are
+        reported without being sent to Zabbix and keep their number.
+        """
         results = []
         
+        # Hosts are collected first and sent to Zabbix in one call:
+        # (result entry to fill in, hostname, IP address)
+        pending = []
+        
         for i, ip in enumerate(ip_list, 1):
-            ip_clean = ip.strip()
+            try:
+                ipaddress.ip_address(ip)
+            except ValueError:
+                results.append({
+                    'hostname': 'N/A',
+                    'ip': ip,
+                    'success': False,
+                    'message': f"Invalid IP address: {ip}"
+                })
+                continue
             
             if use_ip_as_hostname:
                 # Use IP address as hostname directly (Zabbix 7.0 supports dots in hostnames)
-                hostname = ip_clean
+                hostname = ip
             else:
                 # Use base hostname with sequential numbering
                 hostname = f"{base_hostname}-{i:02d}"
             
-            success, message = self.create_host(hostname, ip_clean, group_id, interface_type, interface_port)
-            results.append({
+            result = {
                 'hostname': hostname,
-                'ip': ip_clean,
-                'success': success,
-                'message': message
-            })
+                'ip': ip,
+                'success': False,
+                'message': ''
+            }
+            results.append(result)
+            pending.append((result, hostname, ip))
+        
+        if not pending:
+            return results
+        
+        # Log in once up front: if the batch failed on authentication, the
+        # per-host fallback would try to log in again for every host and
+        # could get the Zabbix account blocked
+        if not self.ensure_authenticated():
+            for result, _, _ in pending:
+                result['message'] = "Authentication failed"
+            return results
+        
+        host_params = [
+            self.build_host_params(hostname, ip, group_id, interface_type, interface_port)
+            for _, hostname, ip in pending
+        ]
+        
+        # Create all hosts in a single API call
+        try:
+            success, host_ids = self.create_hosts_batch(host_params)
+        except Exception as e:
+            # Zabbix may have created the hosts before the connection failed,
+            # retrying them one by one would report them all as duplicates
+            logger.error("Exception creating host batch: %s", e)
+            for result, hostname, _ in pending:
+                result['message'] = f"No response from Zabbix ({e}), check whether host {hostname} was created"
+            return results
+        
+        if success:
+            interface_name = self.INTERFACE_NAMES.get(interface_type, "Unknown")
+            
+            log_success = logger.isEnabledFor(logging.DEBUG)
+            
+            for (result, hostname, _), host_id in zip(pending, host_ids):
+                if log_success:
+                    logger.debug("Successfully created host %s with ID %s and %s interface", hostname, host_id, interface_name)
+                result['success'] = True
+                result['message'] = f"Host {hostname} created successfully with {interface_name} interface"
+            return results
+        
+        # Zabbix rejected the batch and created nothing, so retry host by host
+        # to report which entries failed and still create the valid ones
+        logger.info("Batch host creation failed, falling back to individual requests")
+        
+        # Host creation is I/O bound, so run the API calls concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = executor.map(
+                lambda host, params: self.create_host(host[1], host[2], group_id, interface_type, interface_port, params),
+                pending,
+                host_params
+            )
+            
+            for (result, _, _), (success, message) in zip(pending, outcomes):
+                result['success'] = success
+                result['message'] = message
         
         return results
     
@@ -402,47 +731,49 @@ class ZabbixAPI:
         hosts = self.get_hosts_by_group(group_id)
         results = []
         
+        # Interface changes are collected first and sent to Zabbix in one call:
+        # (result entry to fill in, arguments for the single-interface method)
+        pending = []
+        
         for host in hosts:
             host_id = host['hostid']
             host_name = host['name']
             interfaces = host.get('interfaces', [])
             
+            # Index the host's interfaces by type in a single pass
+            interfaces_by_type = {}
+            for interface in interfaces:
+                interfaces_by_type.setdefault(interface['type'], []).append(interface)
+            
+            # Existing interfaces of the requested type
+            type_interfaces = interfaces_by_type.get(interface_type, [])
+            
             if operation == 'add':
                 # Get IP from existing Agent interface (type 1) or first interface
-                ip_address = None
-                for interface in interfaces:
-                    if interface['type'] == '1':  # Agent interface
-                        ip_address = interface['ip']
-                        break
+                agent_interfaces = interfaces_by_type.get(1)
+                ip_address = agent_interfaces[0]['ip'] if agent_interfaces else None
                 
                 if not ip_address and interfaces:
                     ip_address = interfaces[0]['ip']
                 
                 if ip_address:
                     # Check if interface type already exists
-                    interface_exists = any(int(iface['type']) == interface_type for iface in interfaces)
+                    interface_exists = bool(type_interfaces)
                     
                     if not interface_exists:
-                        # Check if there's already a main interface of this type
-                        has_main_interface = any(
-                            int(iface['type']) == interface_type and iface['main'] == '1' 
-                            for iface in interfaces
-                        )
-                        
-                        # If no main interface of this type exists, make this one main
-                        is_main = not has_main_interface
+                        # The host has no interface of this type yet, so the new one is main
+                        is_main = True
                         
-                        success, message = self.add_interface_to_host(
-                            host_id, interface_type, ip_address, port, is_main
-                        )
-                        results.append({
+                        result = {
                             'host_name': host_name,
                             'operation': 'add',
                             'interface_type': interface_type,
                             'ip': ip_address,
-                            'success': success,
-                            'message': message
-                        })
+                            'success': False,
+                            'message': ''
+                        }
+                        results.append(result)
+                        pending.append((result, (host_id, interface_type, ip_address, port, is_main)))
                     else:
                         results.append({
                             'host_name': host_name,
@@ -464,22 +795,20 @@ class ZabbixAPI:
             
             elif operation == 'remove':
                 # Find interfaces of the specified type (non-main interfaces only)
-                interfaces_to_remove = [
-                    iface for iface in interfaces 
-                    if int(iface['type']) == interface_type and iface['main'] == '0'
-                ]
+                interfaces_to_remove = [iface for iface in type_interfaces if not iface['main']]
                 
                 if interfaces_to_remove:
                     for interface in interfaces_to_remove:
-                        success, message = self.remove_interface_from_host(interface['interfaceid'])
-                        results.append({
+                        result = {
                             'host_name': host_name,
                             'operation': 'remove',
                             'interface_type': interface_type,
                             'ip': interface['ip'],
-                            'success': success,
-                            'message': message
-                        })
+                            'success': False,
+                            'message': ''
+                        }
+                        results.append(result)
+                        pending.append((result, (interface['interfaceid'],)))
                 else:
                     results.append({
                         'host_name': host_name,
@@ -490,27 +819,105 @@ class ZabbixAPI:
                         'message': 'No removable interface found'
                     })
         
+        if not pending:
+            return results
+        
+        try:
+            if operation == 'add':
+                success, _ = self.interfaces_batch("hostinterface.create", [
+                    self.build_interface_params(*args) for _, args in pending
+                ])
+                message = "Interface added successfully"
+                update_interface = self.add_interface_to_host
+            else:
+                success, _ = self.interfaces_batch("hostinterface.delete", [
+                    args[0] for _, args in pending
+                ])
+                message = "Interface removed successfully"
+                update_interface = self.remove_interface_from_host
+        except Exception as e:
+            # Zabbix may have applied the batch before the connection failed,
+            # retrying would delete missing interfaces or add duplicates
+            logger.error("Exception running interface batch: %s", e)
+            for result, _ in pending:
+                result['message'] = f"No response from Zabbix ({e}), check whether the interface was changed"
+            return results
+        
+        if success:
+            for result, _ in pending:
+                result['success'] = True
+                result['message'] = message
+        else:
+            # Zabbix rejected the batch and changed nothing, so retry one by one
+            # to report which hosts failed and still apply the valid changes
+            logger.info("Batch interface update failed, falling back to individual requests")
+            
+            # Interface updates are I/O bound, so run the API calls concurrently
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                outcomes = executor.map(lambda item: update_interface(*item[1]), pending)
+                
+                for (result, _), (success, message) in zip(pending, outcomes):
+                    result['success'] = success
+                    result['message'] = message
+        
         return results
 
 # Initialize Zabbix API
 zabbix_api = ZabbixAPI()
 
+# Per-host messages are only logged in debug mode, and outside debug mode
+# the console only shows warnings and errors
+if zabbix_api.web_debug:
+    logger.setLevel(logging.DEBUG)
+else:
+    console_handler.setLevel(logging.WARNING)
+
+# Rendered main page, plain and gzipped, per script root (the only thing
+# that changes the template output)
+index_pages = {}
+
 @app.route('/')
 def index():
     """Main page"""
-    return render_template('index.html')
+    page = index_pages.get(request.script_root)
+    if page is None:
+        html = render_template('index.html').encode()
+        page = (html, gzip.compress(html, compresslevel=9))
+        # Re-render on every request in debug mode to pick up template edits
+        if not app.debug:
+            index_pages[request.script_root] = page
+    
+    html, html_gzip = page
+    # Check the quality value, 'gzip;q=0' means gzip is not acceptable
+    if request.accept_encodings['gzip'] > 0:
+        response = Response(html_gzip, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(html, mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/api/groups')
 def get_groups():
     """API endpoint to get Zabbix host groups"""
-    groups = zabbix_api.get_host_groups()
-    return jsonify(groups)
+    body, etag = zabbix_api.get_host_groups_json()
+    response = Response(body, mimetype='application/json')
+    
+    # Don't let the browser keep an empty list, Zabbix may just be unreachable
+    if etag is None:
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    # Let the browser revalidate and get a 304 when the groups haven't changed
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response.make_conditional(request)
 
 @app.route('/api/hosts_by_group/<group_id>')
 def get_hosts_by_group(group_id):
     """API endpoint to get hosts by group"""
     hosts = zabbix_api.get_hosts_by_group(group_id)
-    return jsonify(hosts)
+    return Response(orjson.dumps(hosts), mimetype='application/json')
 
 @app.route('/api/create_hosts', methods=['POST'])
 def create_hosts():
@@ -522,8 +929,23 @@ def create_hosts():
         use_ip_as_hostname = data.get('use_ip_as_hostname', False)
         
         # Get interface type and port
-        interface_type = int(data.get('interface_type', 1))  # Default to Agent
-        interface_port = data.get('interface_port')  # Can be None for default
+        interface_type = data.get('interface_type', 1)  # Default to Agent
+        interface_port = data.get('interface_port') or None  # Can be None for default
+        
+        try:
+            interface_type = int(interface_type)
+        except (TypeError, ValueError):
+            interface_type = 0
+        if interface_type not in ZabbixAPI.INTERFACE_NAMES:
+            return jsonify({'error': 'Interface type must be 1 (Agent), 2 (SNMP), 3 (IPMI) or 4 (JMX)'}), 400
+        
+        if interface_port is not None:
+            try:
+                interface_port = int(interface_port)
+            except (TypeError, ValueError):
+                interface_port = 0
+            if not 1 <= interface_port <= 65535:
+                return jsonify({'error': 'Interface port must be a number from 1 to 65535'}), 400
         
         # Validate input based on mode
         if not use_ip_as_hostname and not data.get('base_hostname'):
@@ -535,8 +957,12 @@ def create_hosts():
         if not data.get('group_id'):
             return jsonify({'error': 'Group ID is required'}), 400
         
+        group_id = str(data['group_id'])
+        if not ZABBIX_ID.fullmatch(group_id):
+            return jsonify({'error': 'Group ID must be a number'}), 400
+        
         # Parse IP list
-        ip_list = [ip.strip() for ip in data['ip_list'].split(',') if ip.strip()]
+        ip_list = IP_TOKEN.findall(data['ip_list'])
         
         if not ip_list:
             return jsonify({'error': 'No valid IPs provided'}), 400
@@ -545,7 +971,7 @@ def create_hosts():
         results = zabbix_api.create_multiple_hosts(
             data.get('base_hostname', ''),
             ip_list,
-            data['group_id'],
+            group_id,
             use_ip_as_hostname,
             interface_type,
             interface_port
@@ -562,7 +988,7 @@ def create_hosts():
         })
         
     except Exception as e:
-        logger.error(f"Error in create_hosts endpoint: {str(e)}")
+        logger.error("Error in create_hosts endpoint: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/mass_update_interfaces', methods=['POST'])
@@ -581,15 +1007,7 @@ def mass_update_interfaces():
         if not data.get('operation') or data['operation'] not in ['add', 'remove']:
             return jsonify({'error': 'Operation must be "add" or "remove"'}), 400
         
-        # Default ports for interface types
-        port_map = {
-            1: "10050",  # Agent
-            2: "161",    # SNMP
-            3: "623",    # IPMI
-            4: "12345"   # JMX
-        }
-        
-        port = data.get('port', port_map.get(int(data['interface_type']), "10050"))
+        port = data.get('port', ZabbixAPI.DEFAULT_PORTS.get(int(data['interface_type']), "10050"))
         
         # Perform mass update
         results = zabbix_api.mass_update_interfaces(
@@ -610,7 +1028,7 @@ def mass_update_interfaces():
         })
         
     except Exception as e:
-        logger.error(f"Error in mass_update_interfaces endpoint: {str(e)}")
+        logger.error("Error in mass_update_interfaces endpoint: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/test_connection')
@@ -624,12 +1042,6 @@ def datetime_filter(timestamp):
     """Format datetime for templates"""
     return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
 
-# Create templates and static directories if they don't exist
-if not os.path.exists('templates'):
-    os.makedirs('templates')
-if not os.path.exists('static'):
-    os.makedirs('static')
-
 if __name__ == '__main__':
     # Check if config file exists
     if not os.path.exists('config.ini'):
@@ -637,7 +1049,17 @@ if __name__ == '__main__':
         sys.exit(1)
     
     # Start the web server
-    logger.info(f"Starting Zabbix Host Creator on {zabbix_api.web_host}:{zabbix_api.web_port}")
+    logger.info("Starting Zabbix Host Creator on %s:%s", zabbix_api.web_host, zabbix_api.web_port)
+    if not zabbix_api.web_debug:
+        # Use gunicorn in production, the Flask server handles one request at a time.
+        # Flush queued log records first, exec replaces the process without atexit.
+        log_listener.stop()
+        try:
+            os.execvp('gunicorn', ['gunicorn', '-c', 'gunicorn.conf.py', 'app:app'])
+        except FileNotFoundError:
+            log_listener.start()
+            logger.warning("gunicorn not found, falling back to the Flask development server")
+    
     app.run(
         host=zabbix_api.web_host,
         port=zabbix_api.web_port,
@@ -5,6 +5,7 @@ Debug script to test Zabbix Host Creator
 
 import sys
 import os
+import importlib.util
 
 print("=" * 60)
 print("ZABBIX HOST CREATOR - DEBUG SCRIPT")
@@ -12,8 +13,8 @@ print("=" * 60)
 
 # Check Python version
 print(f"\n1. Python Version: {sys.version}")
-if sys.version_info < (3, 6):
-    print("   ❌ ERROR: Python 3.6 or higher is required!")
+if sys.version_info < (3, 7):
+    print("   ❌ ERROR: Python 3.7 or higher is required!")
     sys.exit(1)
 else:
     print("   ✅ Python version is OK")
@@ -55,15 +56,16 @@ print("\n3. Checking required Python packages...")
 packages = {
     'flask': 'Flask',
     'requests': 'requests',
-    'urllib3': 'urllib3'
+    'urllib3': 'urllib3',
+    'orjson': 'orjson'
 }
 
 missing_packages = []
 for module, package in packages.items():
-    try:
-        __import__(module)
+    # find_spec only locates the package, without running its import
+    if importlib.util.find_spec(module) is not None:
         print(f"   ✅ {package} is installed")
-    except ImportError:
+    else:
         print(f"   ❌ {package} is NOT installed")
         missing_packages.append(package)
 
@@ -144,7 +146,6 @@ if not missing_packages:
         print("\nStarting Zabbix Host Creator...")
         print("Press Ctrl+C to stop\n")
         try:
-            import app
             app.app.run(
                 host=app.zabbix_api.web_host,
                 port=app.zabbix_api.web_port,
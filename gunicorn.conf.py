@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for Zabbix Host Creator
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import configparser
+import multiprocessing
+
+config = configparser.ConfigParser()
+config.read('config.ini')
+
+# Bind to the same address as configured for the web server
+bind = f"{config.get('webserver', 'host', fallback='0.0.0.0')}:{config.getint('webserver', 'port', fallback=5000)}"
+
+# Threaded workers so Zabbix API calls in one request don't block the others.
+# Requests mostly wait on Zabbix, so raise threads to serve more users at once.
+workers = config.getint('webserver', 'workers', fallback=multiprocessing.cpu_count() * 2 + 1)
+worker_class = 'gthread'
+threads = config.getint('webserver', 'threads', fallback=8)
+keepalive = 5
+
+# Bulk operations can take a while on large host groups
+timeout = 120